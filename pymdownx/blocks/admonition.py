@@ -2,10 +2,21 @@
 import xml.etree.ElementTree as etree
 from .block import Block, type_html_identifier
 from .. blocks import BlocksExtension
+import functools
 import re
 
 RE_SEP = re.compile(r'[_-]+')
 
+# Generated admonition subclasses, shared by all Markdown instances
+_ADMONITION_TYPES = {}
+
+
+@functools.lru_cache(maxsize=None)
+def _default_title(class_name):
+    """Get the default title for an admonition class."""
+
+    return RE_SEP.sub(' ', class_name).title()
+
 
 class Admonition(Block):
     """
@@ -29,6 +40,7 @@ class Admonition(Block):
     }
     DEF_TITLE = None
     DEF_CLASS = None
+    DEF_CLASS_ATTR = None
 
     def on_validate(self, parent):
         """Handle on validate event."""
@@ -37,31 +49,35 @@ class Admonition(Block):
             self.options['type'] = {'name': self.NAME}
             if self.DEF_TITLE:
                 self.options['type']['title'] = self.DEF_TITLE
-            if self.DEF_TITLE:
+            if self.DEF_CLASS:
                 self.options['type']['class'] = self.DEF_CLASS
         return True
 
     def on_create(self, parent):
         """Create the element."""
 
-        # Set classes
-        classes = ['admonition']
-        obj = self.options['type']
-        atype = def_title = class_name = ''
-        if isinstance(obj, dict):
-            atype = obj['name']
-            class_name = obj.get('class', atype)
-            def_title = obj.get('title', RE_SEP.sub(' ', class_name).title())
-        elif isinstance(obj, str):
-            atype = obj
-            class_name = atype
-            def_title = RE_SEP.sub(' ', atype).title()
-
-        if atype and atype != 'admonition':
-            classes.append(class_name)
+        if self.DEF_CLASS_ATTR is not None:
+            # Generated types have their classes and title resolved on registration
+            atype = self.NAME
+            def_title = self.DEF_TITLE
+            class_attr = self.DEF_CLASS_ATTR
+        else:
+            # Set classes
+            obj = self.options['type']
+            atype = def_title = class_name = ''
+            if isinstance(obj, dict):
+                atype = obj['name']
+                class_name = obj.get('class', atype)
+                def_title = obj.get('title', RE_SEP.sub(' ', class_name).title())
+            elif isinstance(obj, str):
+                atype = obj
+                class_name = atype
+                def_title = RE_SEP.sub(' ', atype).title()
+
+            class_attr = f'admonition {class_name}' if atype and atype != 'admonition' else 'admonition'
 
         # Create the admonition
-        el = etree.SubElement(parent, 'div', {'class': ' '.join(classes)})
+        el = etree.SubElement(parent, 'div', {'class': class_attr})
 
         # Create the title
         title = None
@@ -102,21 +118,27 @@ class AdmonitionExtension(BlocksExtension):
         for obj in self.getConfig('types', []):
             if isinstance(obj, dict):
                 name = obj['name']
-                class_name = obj.get('class', name)
-                title = obj.get('title', RE_SEP.sub(' ', class_name).title())
+                class_name = obj.get('class') or name
+                title = obj.get('title') or _default_title(class_name)
             else:
                 name = obj
                 class_name = name
-                title = RE_SEP.sub(' ', class_name).title()
-            subclass = RE_SEP.sub('', name).title()
-            block_mgr.register(
-                type(
-                    subclass,
+                title = _default_title(class_name)
+            key = (name, title, class_name)
+            subclass = _ADMONITION_TYPES.get(key)
+            if subclass is None:
+                subclass = _ADMONITION_TYPES[key] = type(
+                    RE_SEP.sub('', name).title(),
                     (Admonition,),
-                    {'OPTIONS': {}, 'NAME': name, 'DEF_TITLE': title, 'DEF_CLASS': class_name}
-                ),
-                {}
-            )
+                    {
+                        'OPTIONS': {},
+                        'NAME': name,
+                        'DEF_TITLE': title,
+                        'DEF_CLASS': class_name,
+                        'DEF_CLASS_ATTR': f'admonition {class_name}'
+                    }
+                )
+            block_mgr.register(subclass, {})
 
 
 def makeExtension(*args, **kwargs):
@@ -29,40 +29,72 @@ import xml.etree.ElementTree as etree
 from .block import Block, type_html_identifier
 from .. blocks import BlocksExtension
 from markdown.treeprocessors import Treeprocessor
+from itertools import islice
 import re
+import sys
 
-RE_FIG_NUM = re.compile(r'^(\^)?([1-9][0-9]*(?:\.[1-9][0-9]*)*)(?= |$)')
+RE_FIG_NUM = re.compile(r'^(?:([<>])\s*)?(?:(\^)?([1-9][0-9]*(?:\.[1-9][0-9]*)*)(?:\s+|$))?')
 RE_SEP = re.compile(r'[_-]+')
 
+# Generated caption subclasses, shared by all Markdown instances
+_CAPTION_TYPES = {}
 
-def update_tag(el, fig_type, fig_num, template, prepend, md):
-    """Update tag ID and caption prefix."""
+
+def update_tag(el, fig_type, fig_num, format_prefix, prepend, md):
+    """Update tag ID and caption prefix using the figure number's individual parts."""
+
+    parts = [str(x) for x in fig_num]
 
     # Auto add an ID
     if 'id' not in el.attrib:
-        el.attrib['id'] = f'__{fig_type}_' + '_'.join(str(x) for x in fig_num.split('.'))
+        el.attrib['id'] = f'__{fig_type}_' + '_'.join(parts)
 
     # Prefix the caption with a given numbered prefix
-    if template:
-        for child in list(el) if prepend else reversed(el):
-            if child.tag == 'figcaption':
-                children = list(child)
-                value = md.htmlStash.store(template.format(fig_num))
-                if not len(children) or children[0].tag != 'p':
-                    p = etree.Element('p')
-                    span = etree.SubElement(p, 'span', {'class': 'caption-prefix'})
-                    span.text = value
-                    p.tail = child.text
-                    child.text = None
-                    child.insert(0, p)
-                else:
-                    p = children[0]
-                    span = etree.Element('span', {'class': 'caption-prefix'})
-                    span.text = value
-                    empty = not bool(p.text)
-                    span.tail = (' ' + p.text) if not empty else p.text
-                    p.text = None
-                    p.insert(0, span)
+    if format_prefix is not None and len(el):
+        # The caption is usually the first or last child depending on where it was inserted.
+        child = el[0] if prepend else el[-1]
+        if child.tag != 'figcaption':  # pragma: no cover
+            # Defensive: generated captions are always placed at the figure's boundary.
+            child = next((c for c in (el if prepend else reversed(el)) if c.tag == 'figcaption'), None)
+
+        if child is not None:
+            first = child[0] if len(child) else None
+            span = etree.Element('span', {'class': 'caption-prefix'})
+            span.text = md.htmlStash.store(format_prefix('.'.join(parts)))
+            if first is None or first.tag != 'p':
+                # Wrap the caption's leading text in a new paragraph with the prefix
+                p = etree.Element('p')
+                p.append(span)
+                p.tail = child.text
+                child.text = None
+                child.insert(0, p)
+            else:
+                p = first
+                empty = not bool(p.text)
+                span.tail = (' ' + p.text) if not empty else p.text
+                p.text = None
+                p.insert(0, span)
+
+
+def update_counter(counter, last, stack, fig_num):
+    """
+    Advance a figure counter from the depth of the last figure to the given depth.
+
+    The counter only grows, entries beyond the current depth are stale and are reset when
+    the depth is reached again. A manual figure number replaces the count at the current
+    depth if it is not smaller than the existing figure numbers.
+    """
+
+    if stack > last:
+        if stack >= len(counter):
+            counter.extend([0] * (stack + 1 - len(counter)))
+        for i in range(last + 1, stack + 1):
+            counter[i] = 1
+    else:
+        counter[stack] += 1
+
+    if fig_num and fig_num > counter[:stack + 1]:
+        counter[:stack + 1] = fig_num
 
 
 class CaptionTreeprocessor(Treeprocessor):
@@ -75,124 +107,95 @@ class CaptionTreeprocessor(Treeprocessor):
 
         self.auto = config['auto']
         self.prepend = config['prepend']
-        self.type = ''
         self.auto_level = max(0, config['auto_level'])
-        self.fig_types = types
+        # Bound prefix formatter for each figure type that defines a prefix template
+        self.type_table = {k: v.format for k, v in types.items() if v}
 
     def run(self, doc):
         """Update caption IDs and prefixes."""
 
-        parent_map = {c: p for p in doc.iter() for c in p}
-        last = dict.fromkeys(self.fig_types, 0)
-        counters = {k: [0] for k in self.fig_types}
-        fig_type = last_type = self.type
-        figs = []
-        fig_num = ''
-
-        # Calculate the depth and iteration at that depth of the given figure.
-        for el in doc.iter():
+        type_table = self.type_table
+        last = dict.fromkeys(type_table, 0)
+        counters = {k: [0] for k in type_table}
+        # Figures at or beyond this depth are skipped, a level of 0 places no limit on the depth.
+        max_stack = self.auto_level or sys.maxsize
+
+        # Figures are visited in document order. Keep a stack with the type, nested figures,
+        # and relative nesting depth of each figure that encloses the current figure.
+        ancestors = []
+        for el in doc.iter('figure'):
+            while ancestors and el not in ancestors[-1][1]:
+                ancestors.pop()
+
+            # Remove internal attributes before the figure can be skipped
+            attrib = el.attrib
+            prepend = attrib.pop('__figure_prepend', None) is not None
+            fig_type = attrib.pop('__figure_type', None)
+            level = attrib.pop('__figure_level', None)
+            fig_num_str = attrib.pop('__figure_num', None)
+
+            # Determine figure type
+            if fig_type is None:
+                # Found a figure that was not generated by this plugin.
+                continue
+            # See if we have an unknown type or the type has no prefix template.
+            format_prefix = type_table.get(fig_type)
+            if format_prefix is None:  # pragma: no cover
+                # Defensive: only types with a prefix template are tagged for numbering.
+                continue
+            if level is not None:
+                level = int(level)
+            entry = [fig_type, set(el.iter('figure')), level]
+            ancestors.append(entry)
+
+            # Calculate the depth and iteration at that depth of the given figure.
             fig_num = ''
-            stack = -1
-            if el.tag == 'figure':
-                fig_type = last_type
-                prepend = False
-                skip = False
-
-                # Find caption appended or prepended
-                if '__figure_prepend' in el.attrib:
-                    prepend = True
-                    del el.attrib['__figure_prepend']
-
-                # Determine figure type
-                if '__figure_type' in el.attrib:
-                    fig_type = el.attrib['__figure_type']
-                    figs.append(el)
-                    # See if we have an unknown type or the type has no prefix template.
-                    if fig_type not in self.fig_types or not self.fig_types[fig_type]:
-                        continue
-                else:
-                    # Found a figure that was not generated by this plugin.
-                    continue
-
-                # Handle a specified relative nesting depth
-                if '__figure_level' in el.attrib:
-                    stack += int(el.attrib['__figure_level']) + 1
-                    if self.auto_level and stack >= self.auto_level:
-                        continue
-                else:
-                    stack += 1
-
-                current = el
-                while True:
-                    parent = parent_map.get(current, None)
 
-                    # No more parents
-                    if parent is None:
-                        break
+            # Handle a specified relative nesting depth
+            stack = 0 if level is None else level
+            if stack >= max_stack:
+                continue
 
-                    # Check if parent element is a figure of the current type
-                    if parent.tag == 'figure' and parent.attrib['__figure_type'] == fig_type:
-                        # See if position in stack is manually specified
-                        level = '__figure_level' in parent.attrib
-                        if level:
-                            stack += int(parent.attrib['__figure_level']) + 1
-                        else:
-                            stack += 1
-                        if level:
-                            el.attrib['__figure_level'] = str(stack + 1)
-                        # Ensure position in stack is not deeper than the specified level
-                        if self.auto_level and stack >= self.auto_level:
-                            skip = True
-                            break
-
-                    current = parent
-
-                if skip:
-                    # Parent has been skipped so all children are also skipped
+            # Walk up the ancestors, nearest first, skipping the current element.
+            for parent_type, _, parent_level in islice(reversed(ancestors), 1, None):
+                # Only parent figures of the current type affect the depth
+                if parent_type != fig_type:
                     continue
-
-            # Found an appropriate figure at an acceptable depth
-            if stack > -1:
-                # Handle a manual number
-                if '__figure_num' in el.attrib:
-                    fig_num = [int(x) for x in el.attrib['__figure_num'].split('.')]
-                    del el.attrib['__figure_num']
-                    new_stack = len(fig_num) - 1
-                    el.attrib['__figure_level'] = new_stack - stack
-                    stack = new_stack
-
-                # Increment counter
-                l = last[fig_type]
-                counter = counters[fig_type]
-                if stack > l:
-                    counter.extend([1] * (stack - l))
-                elif stack == l:
-                    counter[stack] += 1
+                # See if position in stack is manually specified
+                if parent_level is None:
+                    stack += 1
                 else:
-                    del counter[stack + 1:]
-                    counter[-1] += 1
-                last[fig_type] = stack
-                last_type = fig_type
-
-                # Determine if manual number is not smaller than existing figure numbers at that depth
-                if fig_num and fig_num > counter:
-                    counter[:] = fig_num[:]
-
-                # Apply prefix and ID
-                update_tag(
-                    el,
-                    fig_type,
-                    '.'.join(str(x) for x in counter[:stack + 1]),
-                    self.fig_types.get(fig_type, ''),
-                    prepend,
-                    self.md
-                )
-
-        # Clean up attributes
-        for fig in figs:
-            del fig.attrib['__figure_type']
-            if '__figure_level' in fig.attrib:
-                del fig.attrib['__figure_level']
+                    stack += parent_level + 1
+                    entry[2] = stack + 1
+                # Stop early if position in stack is deeper than the specified level
+                if stack >= max_stack:
+                    break
+
+            if stack >= max_stack:
+                # Parent has been skipped so all children are also skipped
+                continue
+
+            # Handle a manual number
+            if fig_num_str is not None:
+                fig_num = [int(x) for x in fig_num_str.split('.')]
+                new_stack = len(fig_num) - 1
+                entry[2] = new_stack - stack
+                stack = new_stack
+
+            # Increment counter
+            counter = counters[fig_type]
+            update_counter(counter, last[fig_type], stack, fig_num)
+            last[fig_type] = stack
+
+            # Apply prefix and ID
+            update_tag(
+                el,
+                fig_type,
+                islice(counter, stack + 1),
+                format_prefix,
+                prepend,
+                self.md
+            )
 
 
 class Caption(Block):
@@ -221,20 +224,17 @@ class Caption(Block):
 
         argument = self.argument
         if argument:
-            if argument.startswith('>'):
-                self.prepend = False
-                argument = argument[1:].lstrip()
-            elif argument.startswith('<'):
-                self.prepend = True
-                argument = argument[1:].lstrip()
-
+            # Parse the optional caption direction and figure number in one pass
             m = RE_FIG_NUM.match(argument)
-            if m:
-                if m.group(1):
-                    self.level = m.group(2)
+            direction, level, fig_num = m.group(1, 2, 3)
+            if direction:
+                self.prepend = direction == '<'
+            if fig_num:
+                if level:
+                    self.level = fig_num
                 else:
-                    self.fig_num = m.group(2)
-                argument = argument[m.end():].lstrip()
+                    self.fig_num = fig_num
+            argument = argument[m.end():]
 
             if argument:
                 tokens = argument.split()
@@ -261,14 +261,12 @@ class Caption(Block):
 
         # Find sibling to add caption to.
         fig = None
-        child = None
-        children = list(parent)
-        if children:
-            child = children[-1]
+        child = parent[-1] if len(parent) else None
+        if child is not None:
             # Do we have a figure with no caption?
             if child.tag == 'figure':
                 fig = child
-                for c in list(child):
+                for c in child:
                     if c.tag == 'figcaption':
                         fig = None
                         break
@@ -294,7 +292,9 @@ class Caption(Block):
                 classes = ' '.join(self.classes)
             fig.attrib['class'] = classes
 
-        if self.auto:
+        # Only figures with a prefix template need to be numbered.
+        auto = self.auto and bool(self.PREFIX)
+        if auto:
             fig.attrib['__figure_type'] = self.NAME
             if self.level:
                 fig.attrib['__figure_level'] = self.level
@@ -303,7 +303,7 @@ class Caption(Block):
 
         # Add caption to the target figure.
         if self.prepend:
-            if self.auto:
+            if auto:
                 fig.attrib['__figure_prepend'] = "1"
             self.caption = etree.Element('figcaption')
             fig.insert(0, self.caption)
@@ -324,13 +324,15 @@ class Caption(Block):
         if prefix and not self.auto:
             # Levels should not be used in manual mode, but if they are, give a generic result.
             if self.level:
-                self.fig_num = '.'.join(['1'] * (int(self.level) + 1))
-            if self.fig_num:
+                fig_num = [1] * (int(self.level) + 1)
+            else:
+                fig_num = self.fig_num.split('.') if self.fig_num else None
+            if fig_num:
                 update_tag(
                     block,
                     self.NAME,
-                    self.fig_num,
-                    prefix,
+                    fig_num,
+                    prefix.format,
                     self.prepend,
                     self.md
                 )
@@ -392,10 +394,11 @@ class CaptionExtension(BlocksExtension):
                 prefix = ''
                 classes = ''
             types[name] = prefix
-            subclass = RE_SEP.sub('', name).title()
-            block_mgr.register(
-                type(
-                    subclass,
+            key = (name, prefix, classes)
+            subclass = _CAPTION_TYPES.get(key)
+            if subclass is None:
+                subclass = _CAPTION_TYPES[key] = type(
+                    RE_SEP.sub('', name).title(),
                     (Caption,),
                     {
                         'OPTIONS': {},
@@ -403,11 +406,13 @@ class CaptionExtension(BlocksExtension):
                         'PREFIX': prefix,
                         'CLASSES': classes
                     }
-                ),
+                )
+            block_mgr.register(
+                subclass,
                 {'auto_level': config['auto_level'], 'auto': config['auto'], 'prepend': config['prepend']}
             )
 
-        if config['auto']:
+        if config['auto'] and any(types.values()):
             md.treeprocessors.register(CaptionTreeprocessor(md, types, config), 'caption-auto', 4)
 
 
@@ -41,7 +41,7 @@ class Details(Block):
             self.options['type'] = {'name': self.NAME}
             if self.DEF_TITLE:
                 self.options['type']['title'] = self.DEF_TITLE
-            if self.DEF_TITLE:
+            if self.DEF_CLASS:
                 self.options['type']['class'] = self.DEF_CLASS
         return True
 
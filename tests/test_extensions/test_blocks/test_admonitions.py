@@ -1,5 +1,24 @@
 """Test cases for Blocks (admonitions)."""
 from ... import util
+from pymdownx.blocks import BlocksExtension
+from pymdownx.blocks.admonition import Admonition
+
+
+class SpecialAdmonition(Admonition):
+    """Admonition subclass that only specifies a default class."""
+
+    NAME = 'special'
+    OPTIONS = {}
+    DEF_CLASS = 'different'
+
+
+class SpecialAdmonitionExtension(BlocksExtension):
+    """Register the admonition subclass."""
+
+    def extendMarkdownBlocks(self, md, block_mgr):
+        """Extend Markdown blocks."""
+
+        block_mgr.register(SpecialAdmonition, {})
 
 
 class TestBlocksAdmonitions(util.MdCase):
@@ -14,7 +33,8 @@ class TestBlocksAdmonitions(util.MdCase):
                 {'name': 'custom2'},
                 {'name': 'custom3', 'class': 'different'},
                 {'name': 'custom4', 'class': 'different', 'title': 'Default'},
-                {'name': 'custom5', 'title': 'Default'}
+                {'name': 'custom5', 'title': 'Default'},
+                {'name': 'custom6', 'class': ''}
             ]
         }
     }
@@ -238,3 +258,45 @@ class TestBlocksAdmonitions(util.MdCase):
             ''',
             True
         )
+
+    def test_custom_with_empty_class(self):
+        """Test custom with an empty configured class."""
+
+        self.check_markdown(
+            R'''
+            /// custom6
+            Some *content*
+            ///
+            ''',
+            r'''
+            <div class="admonition custom6">
+            <p class="admonition-title">Custom6</p>
+            <p>Some <em>content</em></p>
+            </div>
+            ''',
+            True
+        )
+
+
+class TestBlocksAdmonitionSubclass(util.MdCase):
+    """Test admonition subclasses defined outside of the extension's configuration."""
+
+    extension = [SpecialAdmonitionExtension()]
+
+    def test_default_class(self):
+        """Test that a default class is applied without a default title."""
+
+        self.check_markdown(
+            R'''
+            /// special
+            Some *content*
+            ///
+            ''',
+            r'''
+            <div class="admonition different">
+            <p class="admonition-title">Different</p>
+            <p>Some <em>content</em></p>
+            </div>
+            ''',
+            True
+        )
@@ -1296,6 +1296,90 @@ class TestBlocksCaptionAutoPrefix(util.MdCase):
             True
         )
 
+    def test_manual_number_no_prefix(self):
+        """Test manual number on a caption type without a prefix template."""
+
+        self.check_markdown(
+            R"""
+            Paragraph
+            /// caption | 2
+            Caption
+            ///
+            """,
+            """
+            <figure>
+            <p>Paragraph</p>
+            <figcaption>
+            <p>Caption</p>
+            </figcaption>
+            </figure>
+            """,
+            True
+        )
+
+    def test_nested_mixed_types(self):
+        """Test that nested captions of another type do not affect the nesting depth."""
+
+        self.check_markdown(
+            R"""
+            Para
+            /// figure-caption
+            Figure 1.1
+            ///
+            /// table-caption
+            Table 1
+            ///
+            /// figure-caption
+            Figure 1
+            ///
+            """,
+            """
+            <figure id="__figure-caption_1">
+            <figure id="__table-caption_1">
+            <figure id="__figure-caption_1_1">
+            <p>Para</p>
+            <figcaption>
+            <p><span class="caption-prefix">Figure 1.1.</span> Figure 1.1</p>
+            </figcaption>
+            </figure>
+            <figcaption>
+            <p><span class="caption-prefix">Table 1.</span> Table 1</p>
+            </figcaption>
+            </figure>
+            <figcaption>
+            <p><span class="caption-prefix">Figure 1.</span> Figure 1</p>
+            </figcaption>
+            </figure>
+            """,
+            True
+        )
+
+    def test_caption_in_raw_figure(self):
+        """Test numbering a caption nested in a raw figure without a caption."""
+
+        self.check_markdown(
+            R"""
+            <figure markdown>
+
+            Para
+            /// figure-caption
+            Caption
+            ///
+
+            </figure>
+            """,
+            """
+            <figure>
+            <figure id="__figure-caption_1">
+            <p>Para</p>
+            <figcaption>
+            <p><span class="caption-prefix">Figure 1.</span> Caption</p>
+            </figcaption>
+            </figure>
+            </figure>
+            """,
+            True
+        )
 
     def test_manual_number_increment_levels(self):
         """Test that forced levels and manual numbers with auto works."""
@@ -1562,6 +1646,45 @@ class TestBlocksCaptionAutoLevel(util.MdCase):
             True
         )
 
+    def test_skipped_manual_number(self):
+        """Test that a manual number on a figure skipped due to its depth is not rendered."""
+
+        self.check_markdown(
+            R"""
+            Paragraph
+            /// figure-caption | 1.1.1
+            Caption 1.1.1
+            ///
+
+            /// figure-caption
+            Caption 1.1
+            ///
+
+            /// figure-caption
+            Caption 1
+            ///
+            """,
+            """
+            <figure id="__figure-caption_1">
+            <figure id="__figure-caption_1_1">
+            <figure>
+            <p>Paragraph</p>
+            <figcaption>
+            <p>Caption 1.1.1</p>
+            </figcaption>
+            </figure>
+            <figcaption>
+            <p><span class="caption-prefix">Figure 1.1.</span> Caption 1.1</p>
+            </figcaption>
+            </figure>
+            <figcaption>
+            <p><span class="caption-prefix">Figure 1.</span> Caption 1</p>
+            </figcaption>
+            </figure>
+            """,
+            True
+        )
+
 
 class TestBlocksCaptionAutoLevelPrepend(util.MdCase):
     """Test Blocks caption cases with `auto` level."""
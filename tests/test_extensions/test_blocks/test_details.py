@@ -1,5 +1,25 @@
 """Test cases for Blocks (details)."""
 from ... import util
+from pymdownx.blocks import BlocksExtension
+from pymdownx.blocks.block import type_boolean
+from pymdownx.blocks.details import Details
+
+
+class SpecialDetails(Details):
+    """Details subclass that only specifies a default class."""
+
+    NAME = 'special'
+    OPTIONS = {'open': [False, type_boolean]}
+    DEF_CLASS = 'different'
+
+
+class SpecialDetailsExtension(BlocksExtension):
+    """Register the details subclass."""
+
+    def extendMarkdownBlocks(self, md, block_mgr):
+        """Extend Markdown blocks."""
+
+        block_mgr.register(SpecialDetails, {})
 
 
 class TestBlocksDetails(util.MdCase):
@@ -221,3 +241,27 @@ class TestBlocksDetails(util.MdCase):
             ''',
             True
         )
+
+
+class TestBlocksDetailsSubclass(util.MdCase):
+    """Test details subclasses defined outside of the extension's configuration."""
+
+    extension = [SpecialDetailsExtension()]
+
+    def test_default_class(self):
+        """Test that a default class is applied without a default title."""
+
+        self.check_markdown(
+            R'''
+            /// special
+            Some *content*
+            ///
+            ''',
+            r'''
+            <details class="different">
+            <summary>Different</summary>
+            <p>Some <em>content</em></p>
+            </details>
+            ''',
+            True
+        )